@@ -22,3 +22,7 @@ CREATE TABLE IF NOT EXISTS user_monsters (
     quantity INTEGER DEFAULT 0 CHECK (quantity >= 0),
     UNIQUE(user_id, monster_name)
 );
+
+-- Ownership lookups only read rows with a positive quantity
+CREATE INDEX IF NOT EXISTS idx_user_monsters_user_qty
+    ON user_monsters (user_id) WHERE quantity > 0;
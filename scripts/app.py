@@ -1,10 +1,21 @@
+import glob
 import os
-from io import BytesIO
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from html import escape
+import bcrypt
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import psycopg2
+from psycopg2.extensions import connection
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from dotenv import load_dotenv
-from urllib.parse import urlparse
+from urllib.parse import quote, urlparse
 from datetime import datetime
 from PIL import Image
 
@@ -12,15 +23,26 @@ from PIL import Image
 load_dotenv()
 
 CSV_PATH = "download/archimonsters.csv"
+PARQUET_PATH = "download/archimonsters.parquet"
 IMAGE_FOLDER = "download/Images"
+# Served by Streamlit at app/static/ (requires server.enableStaticServing)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+THUMB_DIR = os.path.join(STATIC_DIR, "thumbs")
+THUMB_URL = "app/static/thumbs"
 MONSTERS_PER_PAGE = 12
-
-# ====== DB Connection Helper ======
-def get_db_connection():
+# How long a session trusts its copy of the ownership map before re-reading it
+OWNED_TTL_SECONDS = 60
+# Connections kept open for the whole process; queries beyond this get a short-lived one
+DB_POOL_SIZE = 10
+# Columns derived at load time for fast filtering; kept out of CSV exports
+HELPER_COLUMNS = ["name_lower", "image_basename"]
+
+# ====== DB Connection Pool ======
+def get_connection_params():
     database_url = os.getenv("DATABASE_URL")
     if database_url:
         parsed = urlparse(database_url)
-        return psycopg2.connect(
+        return dict(
             dbname=parsed.path.lstrip("/"),
             user=parsed.username,
             password=parsed.password,
@@ -28,7 +50,7 @@ def get_db_connection():
             port=parsed.port or 5432
         )
     else:
-        return psycopg2.connect(
+        return dict(
             dbname=os.getenv("POSTGRES_DB", "dofus_user"),
             user=os.getenv("POSTGRES_USER", "dofus_user"),
             password=os.getenv("POSTGRES_PASSWORD", "dofus_pass"),
@@ -36,55 +58,213 @@ def get_db_connection():
             port=os.getenv("POSTGRES_PORT", "5432")
         )
 
+# Hot read queries, parsed and planned once per pooled connection
+PREPARED_STATEMENTS = """
+    PREPARE sel_login (text) AS
+        SELECT id, password FROM users WHERE username = $1;
+    PREPARE sel_owned (integer) AS
+        SELECT monster_name, quantity FROM user_monsters
+        WHERE user_id = $1 AND quantity > 0;
+"""
+
+class PreparingConnection(connection):
+    """psycopg2 connection that remembers whether its session has the statements prepared.
+
+    Every query the app sends is a single statement, so connections run in autocommit:
+    psycopg2 otherwise wraps each one in BEGIN/COMMIT, three round-trips instead of one.
+    """
+    prepared = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.autocommit = True
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    # Shared across reruns and sessions so each query reuses an open connection. minconn
+    # equals maxconn: psycopg2 closes returned connections beyond minconn, which would
+    # reconnect and re-PREPARE whenever two sessions overlap.
+    return ThreadedConnectionPool(
+        DB_POOL_SIZE, DB_POOL_SIZE, connection_factory=PreparingConnection, **get_connection_params()
+    )
+
+@contextmanager
+def db_conn():
+    pool = get_pool()
+    try:
+        conn = pool.getconn()
+        pooled = True
+    except PoolError:
+        # Every pooled connection is busy: serve this query on a one-off connection
+        conn = psycopg2.connect(connection_factory=PreparingConnection, **get_connection_params())
+        pooled = False
+    try:
+        if not conn.prepared:
+            with conn.cursor() as cur:
+                cur.execute(PREPARED_STATEMENTS)
+            conn.prepared = True
+        yield conn
+    finally:
+        if pooled:
+            pool.putconn(conn)
+        else:
+            conn.close()
+
 # ====== Validate User ======
 def validate_user(username, password):
+    """Return the user's id if the password matches its bcrypt hash, else None."""
     try:
-        with get_db_connection() as conn:
+        with db_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT password FROM users WHERE username = %s", (username,))
+                # Id and hash come back together, so login is a single round-trip
+                cur.execute("EXECUTE sel_login (%s)", (username,))
                 row = cur.fetchone()
-                return row and row[0] == password
     except Exception as e:
         st.error(f"❌ Login error: {e}")
-        return False
-
-def get_user_id_by_username(username):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT id FROM users WHERE username = %s", (username,))
-            row = cur.fetchone()
-            if row:
-                return row[0]
-            else:
-                raise ValueError(f"User {username} not found in DB")
+        return None
+    if not row:
+        return None
+    user_id, password_hash = row
+    try:
+        return user_id if bcrypt.checkpw(password.encode(), password_hash.encode()) else None
+    except ValueError:
+        # Not a bcrypt hash (e.g. a row written before passwords were hashed)
+        return None
 
 # ====== Monster Ownership ======
+# Raises on DB errors so a failed query is never cached; callers handle it
+@st.cache_data(ttl=OWNED_TTL_SECONDS, show_spinner=False)
 def load_owned_monsters(user_id):
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("EXECUTE sel_owned (%s)", (user_id,))
+            return dict(cur.fetchall())
+
+def update_quantities(user_id, deltas):
+    """Apply {monster_name: change} for one user in a single round-trip (one atomic statement)."""
+    rows = [(user_id, name, change) for name, change in deltas.items() if change]
+    if not rows:
+        return True
     try:
-        with get_db_connection() as conn:
+        with db_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT monster_name, quantity FROM user_monsters
-                    WHERE user_id = %s AND quantity > 0
-                """, (user_id,))
-                return dict(cur.fetchall())
+                # The raw change is added in the write itself (never to a value read earlier),
+                # so concurrent sessions editing the same row cannot overwrite each other
+                execute_values(cur, """
+                    WITH d (user_id, monster_name, change) AS (VALUES %s),
+                    upd AS (
+                        UPDATE user_monsters um
+                        SET quantity = GREATEST(um.quantity + d.change, 0)
+                        FROM d
+                        WHERE um.user_id = d.user_id AND um.monster_name = d.monster_name
+                        RETURNING um.monster_name
+                    )
+                    INSERT INTO user_monsters (user_id, monster_name, quantity)
+                    SELECT d.user_id, d.monster_name, d.change
+                    FROM d
+                    WHERE d.change > 0 AND d.monster_name NOT IN (SELECT monster_name FROM upd)
+                    ON CONFLICT (user_id, monster_name) DO UPDATE
+                    SET quantity = GREATEST(user_monsters.quantity + EXCLUDED.quantity, 0);
+                """, rows, page_size=len(rows))  # one page: more than 100 deltas must not split
+        load_owned_monsters.clear(user_id)
+        return True
     except Exception as e:
-        st.error(f"❌ Error loading ownership: {e}")
-        return {}
+        st.error(f"❌ Update error: {e}")
+        return False
 
-def update_quantity(user_id, monster_name, change):
+def set_quantities(user_id, targets):
+    """Write {monster_name: quantity} for one user as absolute values in a single statement."""
+    rows = [(user_id, name, max(int(qty), 0)) for name, qty in targets.items()]
+    if not rows:
+        return True
     try:
-        with get_db_connection() as conn:
+        with db_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
+                execute_values(cur, """
                     INSERT INTO user_monsters (user_id, monster_name, quantity)
-                    VALUES (%s, %s, GREATEST(%s, 0))
+                    VALUES %s
                     ON CONFLICT (user_id, monster_name) DO UPDATE
-                    SET quantity = GREATEST(user_monsters.quantity + %s, 0);
-                """, (user_id, monster_name, change, change))
-                conn.commit()
+                    SET quantity = EXCLUDED.quantity;
+                """, rows, page_size=len(rows))
+        load_owned_monsters.clear(user_id)
+        return True
     except Exception as e:
         st.error(f"❌ Update error: {e}")
+        return False
+
+def get_owned_monsters(user_id):
+    # The session copy is kept in step with each write and re-read once the ownership
+    # cache has expired, so changes made in another tab or session show up
+    owned = st.session_state.get("owned_dict")
+    if owned is not None and time.monotonic() - st.session_state.get("owned_loaded_at", 0) < OWNED_TTL_SECONDS:
+        return owned
+    try:
+        fresh = dict(load_owned_monsters(user_id))
+    except Exception as e:
+        st.error(f"❌ Error loading ownership: {e}")
+        return owned if owned is not None else {}
+    st.session_state.owned_dict = fresh
+    st.session_state.owned_loaded_at = time.monotonic()
+    return fresh
+
+def apply_deltas_locally(deltas):
+    """Mirror update_quantities() on the session copy, clamping at 0 like the SQL does."""
+    owned = st.session_state.get("owned_dict")
+    if owned is None:
+        return
+    for name, change in deltas.items():
+        qty = max(owned.get(name, 0) + change, 0)
+        if qty:
+            owned[name] = qty
+        else:
+            owned.pop(name, None)
+
+def apply_targets_locally(targets):
+    """Mirror set_quantities() on the session copy."""
+    owned = st.session_state.get("owned_dict")
+    if owned is None:
+        return
+    for name, qty in targets.items():
+        if qty > 0:
+            owned[name] = int(qty)
+        else:
+            owned.pop(name, None)
+
+# Button callbacks only queue changes; they are written once per rerun.
+# +/- are deltas; reset/set are absolute targets, never a delta against a possibly stale copy.
+def queue_quantity_change(monster_name, change, message=None):
+    targets = st.session_state.get("pending_targets", {})
+    if monster_name in targets:
+        # A target queued earlier in this rerun absorbs the change
+        targets[monster_name] = max(targets[monster_name] + change, 0)
+    else:
+        pending = st.session_state.setdefault("pending_deltas", {})
+        pending[monster_name] = pending.get(monster_name, 0) + change
+    if message:
+        st.toast(message)
+
+def queue_target_quantity(monster_name, target, message=None):
+    st.session_state.setdefault("pending_targets", {})[monster_name] = max(int(target), 0)
+    # Changes queued before the target are superseded by it
+    st.session_state.get("pending_deltas", {}).pop(monster_name, None)
+    if message:
+        st.toast(message)
+
+def queue_reset_quantity(monster_name):
+    queue_target_quantity(monster_name, 0, f"Reset {monster_name} to 0")
+
+def queue_set_quantity(monster_name, widget_key):
+    target = int(st.session_state[widget_key])
+    queue_target_quantity(monster_name, target, f"Set {monster_name} to {target}")
+
+def flush_pending_changes(user_id):
+    # Deltas and targets never share a monster name, so their order does not matter
+    deltas = st.session_state.pop("pending_deltas", None)
+    if deltas and update_quantities(user_id, deltas):
+        apply_deltas_locally(deltas)
+    targets = st.session_state.pop("pending_targets", None)
+    if targets and set_quantities(user_id, targets):
+        apply_targets_locally(targets)
 
 def safe_rerun():
     if hasattr(st, "experimental_rerun"):
@@ -106,42 +286,146 @@ st.set_page_config(
 )
 st.title("🧟‍♂️ Dofus Archimonsters Viewer")
 
-# Global styles
-st.markdown(
-    """
-    <style>
-    .monster-card {
-        border: 1px solid #e6e6e6;
-        border-radius: 10px;
-        padding: 0.75rem;
-        margin-bottom: 1rem;
-        background: #ffffffaa;
-        box-shadow: 0 1px 2px rgba(0,0,0,0.05);
-        transition: box-shadow .2s ease, transform .1s ease;
-    }
-    .monster-card:hover { box-shadow: 0 4px 12px rgba(0,0,0,0.12); transform: translateY(-2px); }
-    .monster-title { font-weight: 700; margin: 0.25rem 0 0.5rem 0; }
-    .monster-img img { object-fit: contain; width: 100%; height: auto; max-height: 180px; border-radius: 8px; background: #f8f9fa; }
-    .mon-meta { color: #666; font-size: 0.9rem; margin-top: .25rem; }
-    .filters .stSlider > div > div { padding-top: 0.25rem; }
-    .muted { color:#888; }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Global styles (thumbnail height is driven by the --img-h custom property)
+BASE_CSS = """
+.monster-card {
+    border: 1px solid #e6e6e6;
+    border-radius: 10px;
+    padding: 0.75rem;
+    margin-bottom: 1rem;
+    background: #ffffffaa;
+    box-shadow: 0 1px 2px rgba(0,0,0,0.05);
+    transition: box-shadow .2s ease, transform .1s ease;
+}
+.monster-card:hover { box-shadow: 0 4px 12px rgba(0,0,0,0.12); transform: translateY(-2px); }
+.monster-title { font-weight: 700; margin: 0.25rem 0 0.5rem 0; }
+.monster-img img { object-fit: contain; width: 100%; height: auto; max-height: var(--img-h, 180px); border-radius: 8px; background: #f8f9fa; }
+.mon-meta { color: #666; font-size: 0.9rem; margin-top: .25rem; }
+.filters .stSlider > div > div { padding-top: 0.25rem; }
+.muted { color:#888; }
+"""
+
+# Dense layout overrides, appended when compact mode is on
+COMPACT_CSS = """
+.monster-card { padding: 0.5rem; margin-bottom: 0.5rem; }
+.monster-title { font-size: 0.95rem; }
+.mon-meta { font-size: 0.8rem; }
+/* General buttons */
+.stButton > button,
+div[data-testid="stButton"] > button,
+div[data-testid="baseButton-secondary"] > button,
+div[data-testid="baseButton-primary"] > button,
+div[data-testid="stDownloadButton"] > button,
+div[data-testid="stPopoverButton"] > button,
+button[kind="secondary"] {
+    padding: 0.12rem 0.28rem;
+    min-height: 20px;
+    height: 20px;
+        line-height: 1;
+    font-size: 0.72rem;
+    border-radius: 6px;
+}
+    /* Card-local buttons even smaller */
+.monster-card .stButton > button { padding: 0.10rem 0.26rem; min-height: 20px; height: 20px; font-size: 0.72rem; }
+/* Number input (pager) */
+div[data-testid="stNumberInput"] input {
+        padding: 0.12rem 0.35rem;
+        height: 26px;
+        font-size: 0.8rem;
+}
+div[data-testid="stNumberInput"] button {
+    transform: scale(0.9);
+}
+/* Extra-small circular qty buttons */
+.monster-card .qty-btn .stButton > button {
+    width: 20px;
+    min-width: 20px;
+    height: 20px;
+    padding: 0;
+    border-radius: 50%;
+    font-size: 0.7rem;
+}
+/* Narrow number input inside cards */
+.monster-card div[data-testid=\"stNumberInput\"] input { width: 64px; }
+/* Reduce column gutters a bit */
+div[data-testid=\"column\"] { padding-left: 0.25rem; padding-right: 0.25rem; }
+"""
+
+@st.cache_data(show_spinner=False)
+def base_css(compact: bool) -> str:
+    return "<style>" + BASE_CSS + (COMPACT_CSS if compact else "") + "</style>"
+
+# ====== Load Monsters ======
+def ensure_parquet(csv_path: str, parquet_path: str) -> str:
+    """Convert the scraped CSV to Parquet once (and again whenever the CSV is newer)."""
+    if os.path.exists(parquet_path) and not (
+        os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(parquet_path)
+    ):
+        return parquet_path
+    # Written under a unique temp name and swapped in, so concurrent sessions or an
+    # interrupted write never leave a truncated file under the final name
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(parquet_path) or ".", suffix=".parquet.part")
+        os.close(fd)
+        pd.read_csv(csv_path).to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, parquet_path)
+        return parquet_path
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        # Read-only download folder or similar: keep serving the CSV
+        return csv_path
 
-# ====== Load CSV ======
-if not os.path.exists(CSV_PATH):
+if not os.path.exists(CSV_PATH) and not os.path.exists(PARQUET_PATH):
     st.error(f"❌ File not found: {CSV_PATH}")
     st.stop()
 
 @st.cache_data(show_spinner=False)
-def load_monsters_csv(path: str) -> pd.DataFrame:
-    _df = pd.read_csv(path)
-    _df["level_num"] = _df["level"].astype(str).str.extract(r'(\d+)')[0].fillna(0).astype(int)
+def load_monsters(path: str) -> pd.DataFrame:
+    # Parquet loads typed columns directly, far faster than re-parsing the CSV on cold starts
+    if path.endswith(".parquet"):
+        _df = pd.read_parquet(path, engine="pyarrow")
+    else:
+        _df = pd.read_csv(path)
+    # Plain numeric levels parse in C; only the rest (e.g. "Niv. 35 - 47") go through the regex
+    nums = pd.to_numeric(_df["level"], errors="coerce")
+    unparsed = nums.isna()
+    if unparsed.any() and not pd.api.types.is_numeric_dtype(_df["level"]):
+        # One regex pass over the leftovers, straight to a Series (no str copy, no DataFrame)
+        nums[unparsed] = pd.to_numeric(
+            _df.loc[unparsed, "level"].str.extract(r'(\d+)', expand=False), errors="coerce"
+        )
+    # Levels top out at 1200: the smallest unsigned dtype that fits (uint16 at most) replaces int64
+    _df["level_num"] = pd.to_numeric(nums.fillna(0), downcast="unsigned")
+    _df["name_lower"] = _df["name"].str.lower()
+    _df["image_basename"] = _df["local_image"].astype(str).map(os.path.basename)
+    # Categorical codes make isin()/groupby compare ints instead of hashing strings
+    _df["name"] = _df["name"].astype("category")
     return _df
 
-df = load_monsters_csv(CSV_PATH)
+# One directory listing replaces a stat() per row on every rerun
+@st.cache_data(ttl=300, show_spinner=False)
+def image_index(folder: str = IMAGE_FOLDER) -> frozenset:
+    if not os.path.isdir(folder):
+        return frozenset()
+    return frozenset(os.listdir(folder))
+
+# Reruns from unrelated widgets reuse the serialized bytes instead of re-encoding.
+# Every filter/ownership variant is a new key, so the cache is bounded in size and age.
+@st.cache_data(max_entries=32, ttl=600, show_spinner=False)
+def to_csv_bytes(frame: pd.DataFrame) -> bytes:
+    return frame.drop(columns=HELPER_COLUMNS, errors="ignore").to_csv(index=False).encode("utf-8")
+
+df = load_monsters(ensure_parquet(CSV_PATH, PARQUET_PATH))
+
+# Keyed on the ownership snapshot, so reruns that don't change quantities skip the copy and encode
+@st.cache_data(max_entries=32, ttl=600, show_spinner=False)
+def build_owned_csv(user_id, owned_items) -> bytes:
+    # On the categorical name, map() looks up each category once and gathers by code
+    qty = df["name"].map(dict(owned_items)).astype("Int32").dropna()
+    owned_df = df.loc[qty.index].assign(quantity=qty)
+    return owned_df.drop(columns=HELPER_COLUMNS, errors="ignore").to_csv(index=False).encode("utf-8")
 
 # ====== Login Form ======
 if "user_id" not in st.session_state:
@@ -158,12 +442,12 @@ with cols_login[1]:
          logout_button = st.button("🚪 Logout")
 
 if login_button:
-    if validate_user(username_input.strip(), password_input.strip()):
-        user_id = get_user_id_by_username(username_input.strip())
-        if user_id:
-            st.session_state.user_id = user_id
-            st.session_state.username = username_input.strip()
-            st.success(f"✅ Logged in as {st.session_state.username}")
+    user_id = validate_user(username_input.strip(), password_input.strip())
+    if user_id:
+        st.session_state.user_id = user_id
+        st.session_state.username = username_input.strip()
+        st.session_state.pop("owned_dict", None)
+        st.success(f"✅ Logged in as {st.session_state.username}")
     else:
         st.warning("❌ Invalid username or password.")
         st.session_state.user_id = None
@@ -171,6 +455,7 @@ if login_button:
 if logout_button:
     st.session_state.user_id = None
     st.session_state.username = ""
+    st.session_state.pop("owned_dict", None)
     st.toast("Logged out.")
 
 if not st.session_state.user_id:
@@ -194,13 +479,17 @@ with st.sidebar:
             st.session_state["image_height"] = st.session_state.pop("pending_image_height")
         if "pending_cols_per_row" in st.session_state:
             st.session_state["cols_per_row"] = st.session_state.pop("pending_cols_per_row")
-    ownership_filter = st.radio("🎯 Ownership", ["All", "Owned", "Not Owned"], horizontal=True)
-    search_term = st.text_input("🔍 Search", placeholder="Type a monster name...").strip()
-    level_range = st.slider("🧪 Level Range", 0, 200, (0, 200))
+    # Submitted together so typing or dragging doesn't rerun the app on every change
+    with st.form("filters", border=False):
+        ownership_filter = st.radio("🎯 Ownership", ["All", "Owned", "Not Owned"], horizontal=True)
+        search_term = st.text_input("🔍 Search", placeholder="Type a monster name...").strip()
+        level_range = st.slider("🧪 Level Range", 0, 200, (0, 200))
+        st.form_submit_button("✅ Apply filters")
     show_missing_images = st.checkbox("🖼️ Only show missing images", value=False)
     sort_by = st.selectbox("↕️ Sort by", ["Name", "Level"], index=0)
     sort_asc = st.toggle("⬆️ Ascending", value=True)
     per_page = st.select_slider("📦 Items per page", options=[6, 9, 12, 15, 18, 24], value=12)
+    browse_view = st.radio("🗂️ View", ["Cards", "Grid"], horizontal=True, help="Grid edits many quantities at once with fewer widgets")
     st.markdown("---")
     _size_options = ["XS", "Small", "Medium", "Large"]
     _preset_map = {"XS": 60, "Small": 90, "Medium": 120, "Large": 160}
@@ -241,86 +530,34 @@ if clear_filters:
     st.toast("Filters cleared")
     safe_rerun()
 
-# Dynamic style overrides
-compact_css = """
-.monster-card { padding: 0.5rem; margin-bottom: 0.5rem; }
-.monster-title { font-size: 0.95rem; }
-.mon-meta { font-size: 0.8rem; }
-/* General buttons */
-.stButton > button,
-div[data-testid="stButton"] > button,
-div[data-testid="baseButton-secondary"] > button,
-div[data-testid="baseButton-primary"] > button,
-div[data-testid="stDownloadButton"] > button,
-div[data-testid="stPopoverButton"] > button,
-button[kind="secondary"] {
-    padding: 0.12rem 0.28rem;
-    min-height: 20px;
-    height: 20px;
-        line-height: 1;
-    font-size: 0.72rem;
-    border-radius: 6px;
-}
-    /* Card-local buttons even smaller */
-.monster-card .stButton > button { padding: 0.10rem 0.26rem; min-height: 20px; height: 20px; font-size: 0.72rem; }
-/* Number input (pager) */
-div[data-testid="stNumberInput"] input {
-        padding: 0.12rem 0.35rem;
-        height: 26px;
-        font-size: 0.8rem;
-}
-div[data-testid="stNumberInput"] button {
-    transform: scale(0.9);
-}
-/* Extra-small circular qty buttons */
-.monster-card .qty-btn .stButton > button {
-    width: 20px;
-    min-width: 20px;
-    height: 20px;
-    padding: 0;
-    border-radius: 50%;
-    font-size: 0.7rem;
-}
-/* Narrow number input inside cards */
-.monster-card div[data-testid=\"stNumberInput\"] input { width: 64px; }
-/* Reduce column gutters a bit */
-div[data-testid=\"column\"] { padding-left: 0.25rem; padding-right: 0.25rem; }
-"""
-
+# Only the CSS variable changes with the slider; the rule set is built once
 st.markdown(
-    f"""
-    <style>
-    .monster-img img {{ max-height: {image_height}px; }}
-    {compact_css if compact_mode else ''}
-    </style>
-    """,
+    f"<style>:root {{ --img-h: {image_height}px; }}</style>{base_css(compact_mode)}",
     unsafe_allow_html=True,
 )
 
 # ====== Filter Logic ======
-owned_dict = load_owned_monsters(st.session_state.user_id)
-owned_names = set(owned_dict.keys())
+flush_pending_changes(st.session_state.user_id)
+owned_dict = get_owned_monsters(st.session_state.user_id)
+# An Index is hashed once here and reused by every isin() below
+owned_names = pd.Index(list(owned_dict.keys()))
 
-filtered_df = df[
-    df["level_num"].between(level_range[0], level_range[1]) &
-    df["name"].str.contains(search_term, case=False, na=False)
-].copy()
+mask = df["level_num"].between(level_range[0], level_range[1])
+if search_term:
+    mask &= df["name_lower"].str.contains(search_term.lower(), regex=False, na=False)
+present_images = image_index()
 
 if show_missing_images:
-    filtered_df = filtered_df[~(filtered_df["local_image"].astype(str).apply(lambda p: os.path.exists(p)))]
+    mask &= ~df["image_basename"].isin(present_images)
 
 if ownership_filter == "Owned":
-    filtered_df = filtered_df[filtered_df["name"].isin(owned_names)]
+    mask &= df["name"].isin(owned_names)
 elif ownership_filter == "Not Owned":
-    filtered_df = filtered_df[~filtered_df["name"].isin(owned_names)]
+    mask &= ~df["name"].isin(owned_names)
 
-filtered_df.reset_index(drop=True, inplace=True)
-
-# Sorting
-if sort_by == "Name":
-    filtered_df.sort_values(by="name", ascending=sort_asc, inplace=True, kind="stable")
-else:
-    filtered_df.sort_values(by="level_num", ascending=sort_asc, inplace=True, kind="stable")
+# Sorting (sort_values returns a new frame, so no defensive copy is needed)
+sort_column = "name" if sort_by == "Name" else "level_num"
+filtered_df = df.loc[mask].sort_values(by=sort_column, ascending=sort_asc, kind="stable")
 
 # ====== Pagination ======
 total_pages = (len(filtered_df) - 1) // max(per_page, 1) + 1
@@ -359,92 +596,188 @@ end = start + per_page
 paginated_df = filtered_df.iloc[start:end]
 
 # ====== Display Monsters ======
+# Thumbnails are written once under static/ and fetched lazily by the browser
+# Raises on errors so a failed conversion is never cached; the caller handles it
 @st.cache_data(show_spinner=False)
-def load_resized_image(path: str, target_h: int) -> tuple[bytes, int]:
+def ensure_thumbnail(path: str, target_h: int, mtime_ns: int) -> str:
+    """Return the static file name of the WebP thumbnail for path, or '' if it has no height."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    # The source's mtime is part of the name (and of the cache key): a re-downloaded portrait gets a fresh thumbnail
+    thumb_name = f"{stem}_{target_h}_{mtime_ns}.webp"
+    thumb_path = os.path.join(THUMB_DIR, thumb_name)
+    if os.path.exists(thumb_path):
+        return thumb_name
+    tmp_path = None
     try:
         with Image.open(path) as im:
             # Preserve aspect ratio based on target height
             w, h = im.size
             if h <= 0:
-                return b"", 0
-            new_w = max(1, int(w * (target_h / h)))
+                return ""
             # Convert mode for consistent output
             if im.mode not in ("RGB", "RGBA"):
                 im = im.convert("RGBA")
-            im = im.resize((new_w, target_h), Image.LANCZOS)
-            buf = BytesIO()
-            im.save(buf, format="PNG", optimize=True)
-            return buf.getvalue(), new_w
+            if h != target_h:
+                new_w = max(1, int(w * (target_h / h)))
+                im = im.resize((new_w, target_h), Image.LANCZOS)
+            os.makedirs(THUMB_DIR, exist_ok=True)
+            # Encoded under a unique temp name and swapped in, so a partial write is never served
+            fd, tmp_path = tempfile.mkstemp(dir=THUMB_DIR, suffix=".webp.part")
+            os.close(fd)
+            # WebP encodes much faster than optimized PNG and is smaller on the wire
+            im.save(tmp_path, format="WEBP", quality=80, method=4)
+            os.replace(tmp_path, thumb_path)
     except Exception:
-        return b"", 0
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    prune_stale_thumbnails(stem, target_h, thumb_name)
+    return thumb_name
+
+def prune_stale_thumbnails(stem: str, target_h: int, keep: str) -> None:
+    """Remove thumbnails of earlier versions of the same portrait at this height."""
+    prefix = f"{stem}_{target_h}_"
+    for old_path in glob.glob(os.path.join(glob.escape(THUMB_DIR), glob.escape(prefix) + "*.webp")):
+        old_name = os.path.basename(old_path)
+        # Only <stem>_<h>_<mtime>.webp, not another portrait whose stem extends this one
+        if old_name != keep and old_name[len(prefix):-len(".webp")].isdigit():
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+@st.cache_resource(show_spinner=False)
+def get_thumbnail_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="thumbnails")
+
+def prefetch_thumbnails(page_df: pd.DataFrame, target_h: int, present: frozenset) -> list[str]:
+    """Generate any missing thumbnails for the page concurrently (PIL releases the GIL)."""
+    # Without static serving the <img> URLs would 404: every card falls back to st.image
+    if not st.get_option("server.enableStaticServing"):
+        return [""] * len(page_df)
+    ctx = get_script_run_ctx()
+
+    def _load(item):
+        path, basename = item
+        if basename not in present:
+            return ""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return ""
+        # Let the cached loader see the session that requested it
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            return ensure_thumbnail(path, target_h, mtime_ns)
+        except Exception:
+            # Not cached, so a later rerun retries; this one falls back to st.image
+            return ""
+
+    items = zip(page_df["local_image"].tolist(), page_df["image_basename"].tolist())
+    return list(get_thumbnail_executor().map(_load, items))
 
 tab_browse, tab_stats, tab_table = st.tabs(["🔎 Browse", "📈 Statistics", "📋 Table"])
 
-with tab_browse:
-    cols = st.columns(cols_per_row)
-    for idx, row in paginated_df.iterrows():
-        col = cols[idx % cols_per_row]
-        with col:
-            st.markdown("<div class='monster-card'>", unsafe_allow_html=True)
-            st.markdown(f"<div class='monster-title'>{row['name']}</div>", unsafe_allow_html=True)
-            img_path = row["local_image"]
-            with st.container():
-                if isinstance(img_path, str) and os.path.exists(img_path):
-                    st.markdown("<div class='monster-img'>", unsafe_allow_html=True)
-                    img_bytes, new_w = load_resized_image(img_path, image_height)
-                    if img_bytes:
-                        st.image(img_bytes, width=new_w)
+# Clicks inside the browse tab only rerun this fragment, not the whole script
+@st.fragment
+def render_browse(paginated_df, present_images, image_height, cols_per_row, browse_view, user_id):
+    flush_pending_changes(user_id)
+    owned_dict = get_owned_monsters(user_id)
+
+    if browse_view == "Grid":
+        editable = paginated_df[["name", "level"]].assign(
+            owned_qty=paginated_df["name"].map(owned_dict).fillna(0).astype(int)
+        )
+        # Key on the page's rows so edits never bleed into another page/filter
+        grid_key = f"grid_{hash(tuple(paginated_df['name']))}"
+        edited = st.data_editor(
+            editable,
+            key=grid_key,
+            num_rows="fixed",
+            disabled=["name", "level"],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "owned_qty": st.column_config.NumberColumn("Owned", min_value=0, max_value=999, step=1),
+            },
+        )
+        if st.button("💾 Save changes", key="grid_save"):
+            new_qty = edited.set_index("name")["owned_qty"]
+            diff = new_qty - editable.set_index("name")["owned_qty"]
+            # Only edited rows are written, as the values typed into the grid
+            changes = new_qty[diff.notna() & (diff != 0)]
+            if changes.empty:
+                st.toast("No change")
+            else:
+                for name, qty in changes.items():
+                    queue_target_quantity(name, int(qty))
+                st.session_state.pop(grid_key, None)
+                st.toast(f"Saved {len(changes)} change(s)")
+                st.rerun(scope="fragment")
+    else:
+        cols = st.columns(cols_per_row)
+        thumbnails = prefetch_thumbnails(paginated_df, image_height, present_images)
+        # itertuples avoids building a Series per card; row.Index keeps widget keys stable
+        for pos, (row, thumb_name) in enumerate(zip(paginated_df.itertuples(), thumbnails)):
+            idx = row.Index
+            col = cols[pos % cols_per_row]
+            with col:
+                st.markdown("<div class='monster-card'>", unsafe_allow_html=True)
+                st.markdown(f"<div class='monster-title'>{row.name}</div>", unsafe_allow_html=True)
+                img_path = row.local_image
+                with st.container():
+                    if row.image_basename in present_images:
+                        if thumb_name:
+                            st.markdown(
+                                f"<div class='monster-img'><img loading='lazy' src='{THUMB_URL}/{quote(thumb_name)}' "
+                                f"alt='{escape(str(row.name), quote=True)}'></div>",
+                                unsafe_allow_html=True,
+                            )
+                        else:
+                            # Fallback to file if resizing failed
+                            st.image(img_path, width=int(image_height))
                     else:
-                        # Fallback to file if resizing failed
-                        st.image(img_path, width=int(image_height))
+                        st.info("🖼️ Image not found", icon="ℹ️")
+
+                qty = owned_dict.get(row.name, 0)
+                st.markdown(
+                    f"<div class='mon-meta'>🎚️ {row.level} · "
+                    + (f"✅ Owned ×{qty}" if qty else "❌ Not Owned")
+                    + "</div>",
+                    unsafe_allow_html=True,
+                )
+
+                c1, c2, c3 = st.columns([1,1,2])
+                with c1:
+                    st.markdown("<div class='qty-btn'>", unsafe_allow_html=True)
+                    st.button(
+                        "➕", key=f"inc_{idx}", help="Increase quantity",
+                        on_click=queue_quantity_change, args=(row.name, 1, f"Added 1 to {row.name}"),
+                    )
                     st.markdown("</div>", unsafe_allow_html=True)
-                else:
-                    st.info("🖼️ Image not found", icon="ℹ️")
-
-            qty = owned_dict.get(row["name"], 0)
-            st.markdown(
-                f"<div class='mon-meta'>🎚️ {row['level']} · "
-                + (f"✅ Owned ×{qty}" if qty else "❌ Not Owned")
-                + "</div>",
-                unsafe_allow_html=True,
-            )
-
-            c1, c2, c3 = st.columns([1,1,2])
-            with c1:
-                st.markdown("<div class='qty-btn'>", unsafe_allow_html=True)
-                if st.button("➕", key=f"inc_{idx}", help="Increase quantity"):
-                    update_quantity(st.session_state.user_id, row["name"], 1)
-                    st.toast(f"Added 1 to {row['name']}")
-                    safe_rerun()
-                st.markdown("</div>", unsafe_allow_html=True)
-            with c2:
-                st.markdown("<div class='qty-btn'>", unsafe_allow_html=True)
-                if st.button("➖", key=f"dec_{idx}", help="Decrease quantity"):
-                    update_quantity(st.session_state.user_id, row["name"], -1)
-                    st.toast(f"Removed 1 from {row['name']}")
-                    safe_rerun()
+                with c2:
+                    st.markdown("<div class='qty-btn'>", unsafe_allow_html=True)
+                    st.button(
+                        "➖", key=f"dec_{idx}", help="Decrease quantity",
+                        on_click=queue_quantity_change, args=(row.name, -1, f"Removed 1 from {row.name}"),
+                    )
+                    st.markdown("</div>", unsafe_allow_html=True)
+                with c3:
+                    with st.popover("⋯", use_container_width=True):
+                        st.caption("Quick actions")
+                        st.button(
+                            "Reset to 0", key=f"reset_{idx}",
+                            on_click=queue_reset_quantity, args=(row.name,),
+                        )
+                        st.number_input("Set quantity", min_value=0, max_value=999, value=int(qty), key=f"setqty_{idx}")
+                        st.button(
+                            "Apply", key=f"applyqty_{idx}",
+                            on_click=queue_set_quantity, args=(row.name, f"setqty_{idx}"),
+                        )
                 st.markdown("</div>", unsafe_allow_html=True)
-            with c3:
-                with st.popover("⋯", use_container_width=True):
-                    st.caption("Quick actions")
-                    if st.button("Reset to 0", key=f"reset_{idx}"):
-                        # Set to 0 by subtracting current qty if any
-                        if qty:
-                            update_quantity(st.session_state.user_id, row["name"], -int(qty))
-                            st.toast(f"Reset {row['name']} to 0")
-                            safe_rerun()
-                        else:
-                            st.toast("Already 0")
-                    set_qty = st.number_input("Set quantity", min_value=0, max_value=999, value=int(qty), key=f"setqty_{idx}")
-                    if st.button("Apply", key=f"applyqty_{idx}"):
-                        delta = int(set_qty) - int(qty)
-                        if delta != 0:
-                            update_quantity(st.session_state.user_id, row["name"], delta)
-                            st.toast(f"Set {row['name']} to {int(set_qty)}")
-                            safe_rerun()
-                        else:
-                            st.toast("No change")
-            st.markdown("</div>", unsafe_allow_html=True)
+
+with tab_browse:
+    render_browse(paginated_df, present_images, image_height, cols_per_row, browse_view, st.session_state.user_id)
 
 with tab_stats:
     total_available = len(df)
@@ -462,8 +795,8 @@ with tab_stats:
     st.progress(pct, text=f"Collection completion: {pct:.1%}")
 
     st.markdown("### Level distribution (filtered)")
-    level_counts = filtered_df.groupby("level_num").size().reset_index(name="count").sort_values("level_num")
-    st.bar_chart(level_counts, x="level_num", y="count", height=240)
+    level_counts = filtered_df["level_num"].value_counts().sort_index()
+    st.bar_chart(level_counts, height=240)
 
     st.markdown("### Owned vs Missing (filtered)")
     df_om = filtered_df.assign(is_owned=filtered_df["name"].isin(owned_names))
@@ -478,7 +811,7 @@ with tab_table:
     with dl_cols[0]:
         st.download_button(
             label="⬇️ Download filtered CSV",
-            data=table_df.to_csv(index=False).encode("utf-8"),
+            data=to_csv_bytes(table_df),
             file_name=f"filtered_monsters_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv",
         )
@@ -492,10 +825,7 @@ st.info(f"📊 `{st.session_state.username}` owns {total_owned} out of {total_av
 
 # ====== Export Owned Monsters as CSV ======
 if total_owned > 0:
-    owned_df = df[df["name"].isin(owned_dict.keys())].copy()
-    owned_df["quantity"] = owned_df["name"].map(owned_dict)
-
-    csv_data = owned_df.to_csv(index=False).encode("utf-8")
+    csv_data = build_owned_csv(st.session_state.user_id, tuple(sorted(owned_dict.items())))
 
     st.download_button(
         label="📤 Download Owned Monsters as CSV",
@@ -505,10 +835,10 @@ if total_owned > 0:
     )
 
 # Export missing monsters CSV
-missing_names = [n for n in df["name"].tolist() if n not in owned_names]
-if len(missing_names) > 0:
-    missing_df = df[df["name"].isin(missing_names)].copy()
-    miss_csv = missing_df.to_csv(index=False).encode("utf-8")
+missing_mask = ~df["name"].isin(owned_names)
+if missing_mask.any():
+    missing_df = df.loc[missing_mask]
+    miss_csv = to_csv_bytes(missing_df)
     st.download_button(
         label="📥 Download Missing Monsters as CSV",
         data=miss_csv,
@@ -1,13 +1,25 @@
 import os
-import re
+import csv
 import time
-import random
+import asyncio
 import logging
-import requests
-import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import lru_cache, partial
+from io import StringIO
+from operator import itemgetter
+import hashlib
+import sqlite3
+import bcrypt
+import httpx
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import psycopg2
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from psycopg2.extras import execute_values
+from selectolax.lexbor import LexborHTMLParser as HTMLParser
+from urllib.parse import unquote, urljoin, urlparse
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
@@ -21,11 +33,25 @@ load_dotenv()
 
 # ====== Config ======
 BASE_URL = "https://www.dofus-touch.com/fr/mmorpg/encyclopedie/monstres?text=&monster_level_min=1&monster_level_max=1200&monster_type[0]=archimonster"
+IMAGE_HOST = "https://static.ankama.com/"
 DOWNLOAD_DIR = "download/Images"
 EXPORT_DIR = "download"
 CSV_FILEPATH = os.path.join(EXPORT_DIR, "archimonsters.csv")
+PARQUET_FILEPATH = os.path.join(EXPORT_DIR, "archimonsters.parquet")
+URL_CACHE_FILEPATH = os.path.join(EXPORT_DIR, ".urlcache.sqlite")
 PAGES_TO_SCRAPE = 12
+PAGE_WORKERS = 4
+# Politeness cap per host, replacing the fixed 1.5-3 s sleep after every page
+PAGE_REQUESTS_PER_SECOND = 2
 WAIT_TIMEOUT = 30
+DOWNLOAD_CONCURRENCY = 20
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Error pages and API payloads are never portraits; anything else (image/*, octet-stream) is kept
+REJECTED_CONTENT_TYPES = ("text/", "application/json", "application/xml", "application/xhtml")
+MONSTER_FIELDS = ["name", "level", "url_image", "local_image"]
+# Field tuples in column order, without DictWriter's per-row key resolution
+monster_row = itemgetter(*MONSTER_FIELDS)
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
 # ====== Logging ======
 logging.basicConfig(
@@ -55,9 +81,9 @@ def get_db_connection():
         )
 
 # ====== Initialize DB schema ======
-def initialize_schema():
+def initialize_schema(conn):
     try:
-        with get_db_connection() as conn:
+        with conn:
             with conn.cursor() as cur:
                 # Users table
                 cur.execute("""
@@ -89,38 +115,49 @@ def initialize_schema():
                         UNIQUE(user_id, monster_name)
                     );
                 """)
+
+                # Partial index for the app's "owned monsters" lookup (quantity > 0)
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_user_monsters_user_qty
+                    ON user_monsters (user_id) WHERE quantity > 0;
+                """)
                 conn.commit()
         logging.info("✅ Database schema initialized successfully.")
     except Exception as e:
         logging.error(f"❌ Failed to initialize schema: {e}")
 
 # ====== Insert test users ======
-def insert_test_users():
+def hash_password(password):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=12)).decode()
+
+def insert_test_users(conn):
     try:
         test_users = [
             ("alice", "alicepass"),
             ("bob", "bobpass"),
             ("charlie", "charliepass")
         ]
-        with get_db_connection() as conn:
+        with conn:
             with conn.cursor() as cur:
-                for username, password in test_users:
-                    cur.execute("""
-                        INSERT INTO users (username, password)
-                        VALUES (%s, %s)
-                        ON CONFLICT (username) DO NOTHING;
-                    """, (username, password))
+                # Existing rows are only rewritten if they still hold a plaintext password
+                execute_values(cur, """
+                    INSERT INTO users (username, password)
+                    VALUES %s
+                    ON CONFLICT (username) DO UPDATE
+                    SET password = EXCLUDED.password
+                    WHERE users.password NOT LIKE '$2%%';
+                """, [(username, hash_password(password)) for username, password in test_users])
                 conn.commit()
         logging.info("🧪 Inserted test users")
     except Exception as e:
         logging.error(f"❌ Failed to insert test users: {e}")
 
 # ====== Check if already scraped ======
-def is_already_scraped():
+def is_already_scraped(conn):
     if not os.path.exists(CSV_FILEPATH):
         return False
     try:
-        with get_db_connection() as conn:
+        with conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT COUNT(*) FROM archimonsters;")
                 count = cur.fetchone()[0]
@@ -139,38 +176,78 @@ def setup_driver():
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+    # Only the table markup is read: skip image loads and stop waiting once the DOM is ready
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    options.page_load_strategy = "eager"
     return webdriver.Chrome(options=options)
 
 # ====== Helpers ======
+# Characters Windows/POSIX filenames can't hold, deleted in one C-level pass
+FILENAME_DELETE_TABLE = str.maketrans("", "", '\\/*?:"<>|')
+
 def sanitize_filename(name):
-    return re.sub(r'[\\/*?:"<>|]', "", name).replace(" ", "_").strip()
+    return name.translate(FILENAME_DELETE_TABLE).replace(" ", "_").strip()
 
 def get_extension_from_url(url):
     basename = url.split("/")[-1].split("?")[0]
     return os.path.splitext(basename)[1] or ".png"
 
-def download_image(url, monster_name, base_dir=DOWNLOAD_DIR):
-    os.makedirs(base_dir, exist_ok=True)
+async def download_image(client, semaphore, url, monster_name, base_dir=DOWNLOAD_DIR):
+    if not url:
+        return ""
     safe_name = sanitize_filename(monster_name)
     ext = get_extension_from_url(url)
     filepath = os.path.join(base_dir, f"{safe_name}{ext}")
 
-    # Skip download if file already exists
-    if os.path.exists(filepath):
+    # Skip download if a non-empty file already exists (an empty one is a failed earlier write)
+    if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
         logging.info(f"⏩ Skipping image for '{monster_name}' (already exists)")
         return filepath
 
+    # Chunks go to a temporary file that only replaces the target once complete
+    part_path = f"{filepath}.part"
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        with open(filepath, "wb") as f:
-            f.write(response.content)
+        async with semaphore:
+            async with client.stream("GET", url, timeout=10) as response:
+                response.raise_for_status()
+                # Headers arrive before the body: an HTML error page is dropped unread
+                content_type = response.headers.get("Content-Type", "")
+                if content_type.lower().startswith(REJECTED_CONTENT_TYPES):
+                    raise ValueError(f"unexpected Content-Type {content_type!r}")
+                with open(part_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        # Keep the event loop free for other downloads while the chunk is written
+                        await asyncio.to_thread(f.write, chunk)
+        os.replace(part_path, filepath)
         logging.info(f"✅ Image downloaded for '{monster_name}'")
         return filepath
     except Exception as e:
+        if os.path.exists(part_path):
+            os.remove(part_path)
         logging.warning(f"⚠️ Failed to download image for '{monster_name}': {e}")
         return ""
 
+async def download_images(monsters, concurrency=DOWNLOAD_CONCURRENCY):
+    """Download every monster image concurrently over one HTTP/2 client."""
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(http2=True, headers=HTTP_HEADERS, follow_redirects=True, limits=limits) as client:
+        return await asyncio.gather(*(
+            download_image(client, semaphore, monster["url_image"], monster["name"])
+            for monster in monsters
+        ))
+
+def get_page_html_http(client, page_number):
+    """Fetch a page without a browser; returns an empty tree if the request fails."""
+    url = f"{BASE_URL}&page={page_number}"
+    try:
+        response = client.get(url)
+        response.raise_for_status()
+        return HTMLParser(response.text)
+    except httpx.HTTPError as e:
+        logging.warning(f"⚠️ HTTP fetch failed for page {page_number}: {e}")
+        return HTMLParser("")
+
 def get_page_html(driver, page_number):
     url = f"{BASE_URL}&page={page_number}"
     try:
@@ -178,131 +255,279 @@ def get_page_html(driver, page_number):
         WebDriverWait(driver, WAIT_TIMEOUT).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "table.ak-table"))
         )
-        return BeautifulSoup(driver.page_source, "html.parser")
+        return HTMLParser(driver.page_source)
     except TimeoutException:
         screenshot_path = f"{DOWNLOAD_DIR}/timeout_page_{page_number}.png"
         driver.save_screenshot(screenshot_path)
         logging.warning(f"⚠️ Timeout on page {page_number}. Screenshot saved to {screenshot_path}")
-        return BeautifulSoup("", "html.parser")
+        return HTMLParser("")
     except WebDriverException as e:
         logging.error(f"❌ WebDriver error on page {page_number}: {e}")
-        return BeautifulSoup("", "html.parser")
+        return HTMLParser("")
+
+@lru_cache(maxsize=4096)
+def normalize_image_url(raw_img_url):
+    # Protocol- and root-relative sources are prefixed, not joined: urljoin would collapse
+    # the "/img/../../../" segments and no longer match the URLs already stored
+    if not raw_img_url:
+        return ""
+    if raw_img_url.startswith("//"):
+        return f"https:{raw_img_url}"
+    if raw_img_url.startswith("/"):
+        return f"{IMAGE_HOST.rstrip('/')}{raw_img_url}"
+    return urljoin(IMAGE_HOST, raw_img_url)
 
-def extract_monsters(soup):
-    table = soup.find("table", class_="ak-table")
-    if not table:
+CELL_TAGS = frozenset(("td", "th"))
+
+def image_src(cell):
+    img = cell.css_first("img")
+    return (img.attributes.get("src") or "") if img is not None else ""
+
+def extract_monsters(tree):
+    table = tree.css_first("table.ak-table")
+    if table is None:
         return []
 
-    headers = [th.get_text(strip=True).lower() for th in table.find_all("th")]
+    headers = [th.text(strip=True).lower() for th in table.css("th")]
     name_idx = headers.index("nom") if "nom" in headers else None
     level_idx = headers.index("niveau") if "niveau" in headers else None
 
     if name_idx is None:
         return []
 
-    monsters = []
-    for row in table.find_all("tr")[1:]:
-        cells = row.find_all(["td", "th"])
-        if len(cells) <= name_idx:
-            continue
-
-        name = cells[name_idx].get_text(strip=True)
-        if not name:
-            continue
-
-        level = cells[level_idx].get_text(strip=True) if level_idx is not None else ""
-        img_tag = cells[0].find("img")
-        raw_img_url = img_tag["src"] if img_tag and "src" in img_tag.attrs else ""
-        img_url = (
-            f"https:{raw_img_url}" if raw_img_url.startswith("//")
-            else f"https://static.ankama.com{raw_img_url}" if raw_img_url.startswith("/")
-            else urljoin("https://static.ankama.com/", raw_img_url)
-        )
-
-        local_image = download_image(img_url, name) if img_url else ""
-        monsters.append({
+    # Direct children are walked instead of running a CSS match per row
+    rows = ([cell for cell in row.iter() if cell.tag in CELL_TAGS] for row in table.css("tr")[1:])
+    min_cells = max(name_idx, level_idx if level_idx is not None else 0) + 1
+    # Images are fetched concurrently once every page has been parsed
+    return [
+        {
             "name": name,
-            "level": level,
-            "url_image": img_url,
-            "local_image": local_image
-        })
+            "level": cells[level_idx].text(strip=True) if level_idx is not None else "",
+            "url_image": normalize_image_url(image_src(cells[0])),
+            "local_image": ""
+        }
+        for cells in rows
+        if len(cells) >= min_cells and (name := cells[name_idx].text(strip=True))
+    ]
+
+def export_monsters(monsters):
+    with open(CSV_FILEPATH, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(MONSTER_FIELDS)
+        writer.writerows(map(monster_row, monsters))
+    # The app loads the columnar copy; writing it here saves the conversion on its cold start.
+    # It may be running already, so the file only appears under its final name once complete.
+    part_path = f"{PARQUET_FILEPATH}.part"
+    pq.write_table(pa.Table.from_pylist(monsters), part_path, compression="zstd")
+    os.replace(part_path, PARQUET_FILEPATH)
+
+def copy_archimonsters(cur, monsters):
+    # The whole scrape is streamed with one COPY, then merged with a single upsert
+    buf = StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(map(monster_row, monsters))
+    buf.seek(0)
+    cur.execute("""
+        CREATE TEMP TABLE archimonsters_stage (
+            name TEXT, level TEXT, url_image TEXT, local_image TEXT
+        ) ON COMMIT DROP;
+    """)
+    # FORCE_NOT_NULL keeps empty fields as '' rather than NULL, as the row inserts did
+    cur.copy_expert("""
+        COPY archimonsters_stage (name, level, url_image, local_image)
+        FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (level, url_image, local_image));
+    """, buf)
+    cur.execute("""
+        INSERT INTO archimonsters (name, level, url_image, local_image)
+        SELECT DISTINCT ON (name) name, level, url_image, local_image
+        FROM archimonsters_stage
+        ON CONFLICT (name) DO UPDATE
+        SET level = EXCLUDED.level,
+            url_image = EXCLUDED.url_image,
+            local_image = EXCLUDED.local_image;
+    """)
 
-    return monsters
+def populate_user_monsters(cur, monsters):
+    cur.execute("SELECT id FROM users;")
+    user_ids = [row[0] for row in cur.fetchall()]
+    sample_names = np.array([monster["name"] for monster in monsters], dtype=object)
+    per_user = min(12, len(sample_names))
+    # All picks and quantities are drawn in C, one call each, instead of per row
+    rng = np.random.default_rng()
+    picks = rng.permuted(np.tile(np.arange(len(sample_names)), (len(user_ids), 1)), axis=1)[:, :per_user]
+    quantities = rng.integers(1, 6, size=picks.shape)
+    rows = [
+        (user_id, sample_names[idx], int(qty))
+        for user_id, user_picks, user_qtys in zip(user_ids, picks, quantities)
+        for idx, qty in zip(user_picks, user_qtys)
+    ]
+    execute_values(cur, """
+        INSERT INTO user_monsters (user_id, monster_name, quantity)
+        VALUES %s
+        ON CONFLICT (user_id, monster_name) DO UPDATE
+        SET quantity = EXCLUDED.quantity;
+    """, rows, page_size=500)
 
-def save_to_postgres(df):
+def save_to_postgres(conn, monsters):
+    # Monsters and test ownership land atomically in one transaction. The load is
+    # re-runnable, so its commit need not wait for the WAL flush.
     try:
-        with get_db_connection() as conn:
+        with conn:
             with conn.cursor() as cur:
-                for _, row in df.iterrows():
-                    cur.execute("""
-                        INSERT INTO archimonsters (name, level, url_image, local_image)
-                        VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (name) DO UPDATE
-                        SET level = EXCLUDED.level,
-                            url_image = EXCLUDED.url_image,
-                            local_image = EXCLUDED.local_image;
-                    """, (row["name"], row["level"], row["url_image"], row["local_image"]))
-                conn.commit()
+                cur.execute("SET LOCAL synchronous_commit = off;")
+                copy_archimonsters(cur, monsters)
+                populate_user_monsters(cur, monsters)
         logging.info("✅ Data saved to PostgreSQL")
+        logging.info("🧪 Test data with quantities inserted.")
     except Exception as e:
         logging.error(f"❌ PostgreSQL error: {e}")
 
-def get_user_ids():
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT id FROM users;")
-            return [row[0] for row in cur.fetchall()]
-
-def populate_user_monsters(df):
-    user_ids = get_user_ids()
-    sample_names = df["name"].tolist()
-
+def get_known_images(conn):
+    """Map each stored monster name to its (url_image, local_image); empty if the DB is unavailable."""
+    if conn is None:
+        return {}
     try:
-        with get_db_connection() as conn:
+        with conn:
             with conn.cursor() as cur:
-                for user_id in user_ids:
-                    user_sample = random.sample(sample_names, min(12, len(sample_names)))
-                    for name in user_sample:
-                        qty = random.randint(1, 5)
-                        cur.execute("""
-                            INSERT INTO user_monsters (user_id, monster_name, quantity)
-                            VALUES (%s, %s, %s)
-                            ON CONFLICT (user_id, monster_name) DO UPDATE
-                            SET quantity = EXCLUDED.quantity;
-                        """, (user_id, name, qty))
-                conn.commit()
-        logging.info("🧪 Test data with quantities inserted.")
+                cur.execute("SELECT name, url_image, local_image FROM archimonsters;")
+                return {name: (url or "", path or "") for name, url, path in cur.fetchall()}
     except Exception as e:
-        logging.error(f"❌ Error inserting ownership data: {e}")
+        logging.warning(f"⚠️ Could not load known images: {e}")
+        return {}
+
+# Called once while deduplicating and again while assigning paths; the second is a dict hit
+@lru_cache(maxsize=4096)
+def url_cache_key(url):
+    # Percent-encoded spellings of the same URL share one key
+    return hashlib.blake2b(unquote(url).encode(), digest_size=16).hexdigest()
+
+def open_url_cache():
+    cache = sqlite3.connect(URL_CACHE_FILEPATH)
+    cache.execute("CREATE TABLE IF NOT EXISTS urls (key TEXT PRIMARY KEY, path TEXT NOT NULL)")
+    return cache
+
+def attach_local_images(monsters, known):
+    """Fill each monster's local_image, downloading only images not already on disk."""
+    # Reuse images the DB already has on disk for an unchanged URL
+    pending = []
+    for monster in monsters:
+        known_url, known_path = known.get(monster["name"], ("", ""))
+        if known_url == monster["url_image"] and known_path and os.path.exists(known_path):
+            monster["local_image"] = known_path
+        else:
+            pending.append(monster)
+
+    # Then each remaining URL resolves once, through the on-disk cache or a download
+    unique = {}
+    for monster in pending:
+        if monster["url_image"]:
+            unique.setdefault(url_cache_key(monster["url_image"]), monster)
+    with closing(open_url_cache()) as cache:
+        cached = dict(cache.execute("SELECT key, path FROM urls"))
+        local_paths = {key: cached[key] for key in unique if key in cached and os.path.exists(cached[key])}
+        to_fetch = {key: monster for key, monster in unique.items() if key not in local_paths}
+        downloaded = dict(zip(to_fetch, asyncio.run(download_images(list(to_fetch.values())))))
+        with cache:
+            cache.executemany(
+                "INSERT OR REPLACE INTO urls (key, path) VALUES (?, ?)",
+                [(key, path) for key, path in downloaded.items() if path],
+            )
+    local_paths.update(downloaded)
+
+    for monster in pending:
+        url = monster["url_image"]
+        monster["local_image"] = local_paths.get(url_cache_key(url), "") if url else ""
+    logging.info(
+        f"🖼️ {len(to_fetch)} image(s) fetched, "
+        f"{len(monsters) - len(pending) + len(unique) - len(to_fetch)} reused"
+    )
+
+class HostRateLimiter:
+    """Spaces requests to one host at least 1/rate seconds apart, across threads."""
 
-def run_scraper(pages=PAGES_TO_SCRAPE):
-    driver = setup_driver()
+    def __init__(self, rate):
+        self.min_interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Reserve the next free slot under the lock, then sleep outside it
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+def host_limiter(url):
+    host = urlparse(url).netloc
+    with _host_limiters_lock:
+        if host not in _host_limiters:
+            _host_limiters[host] = HostRateLimiter(PAGE_REQUESTS_PER_SECOND)
+        return _host_limiters[host]
+
+def scrape_page_http(client, page_number):
+    logging.info(f"🔍 Scraping page {page_number}...")
+    host_limiter(BASE_URL).acquire()
+    return extract_monsters(get_page_html_http(client, page_number))
+
+def run_scraper(conn, pages=PAGES_TO_SCRAPE):
+    # Created once here for the downloads and timeout screenshots, not once per image
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    # Chrome is only started if a page does not come back server-rendered
+    driver = None
     all_monsters = []
+    page_numbers = range(1, pages + 1)
+    # One keep-alive HTTP/2 connection serves every page instead of a handshake per request
+    client = httpx.Client(http2=True, headers=HTTP_HEADERS, timeout=15, follow_redirects=True)
     try:
-        for i in range(1, pages + 1):
-            logging.info(f"🔍 Scraping page {i}...")
-            soup = get_page_html(driver, i)
-            monsters = extract_monsters(soup)
+        # Pages are independent; a few workers overlap their loads (results keep page order)
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            results = list(executor.map(partial(scrape_page_http, client), page_numbers))
+        for i, monsters in zip(page_numbers, results):
+            if not monsters:
+                logging.info(f"🌐 No table in raw HTML for page {i}, falling back to Selenium")
+                if driver is None:
+                    driver = setup_driver()
+                host_limiter(BASE_URL).acquire()
+                monsters = extract_monsters(get_page_html(driver, i))
             all_monsters.extend(monsters)
-            time.sleep(random.uniform(1.5, 3.0))  # polite delay
     finally:
-        driver.quit()
-    return pd.DataFrame(all_monsters)
+        client.close()
+        if driver is not None:
+            driver.quit()
+
+    attach_local_images(all_monsters, get_known_images(conn))
+    return all_monsters
 
 # ====== Main ======
 if __name__ == "__main__":
-    initialize_schema()
-    insert_test_users()
+    # One connection serves the whole run; each step still commits or rolls back on its own.
+    # Without a database the pages, CSV and images are still produced.
+    try:
+        conn = get_db_connection()
+    except psycopg2.Error as e:
+        logging.error(f"❌ Could not connect to PostgreSQL, scraping without it: {e}")
+        conn = None
+    try:
+        if conn is not None:
+            initialize_schema(conn)
+            insert_test_users(conn)
 
-    if is_already_scraped():
-        logging.info("✅ Skipping scraping since data already exists.")
-    else:
-        df = run_scraper()
-        if not df.empty:
-            os.makedirs(EXPORT_DIR, exist_ok=True)
-            df.to_csv(CSV_FILEPATH, index=False)
-            save_to_postgres(df)
-            populate_user_monsters(df)
-            logging.info(f"✅ Total monsters scraped: {len(df)}")
+        if conn is not None and is_already_scraped(conn):
+            logging.info("✅ Skipping scraping since data already exists.")
         else:
-            logging.warning("⚠️ No data scraped.")
+            monsters = run_scraper(conn)
+            if monsters:
+                os.makedirs(EXPORT_DIR, exist_ok=True)
+                export_monsters(monsters)
+                if conn is not None:
+                    save_to_postgres(conn, monsters)
+                logging.info(f"✅ Total monsters scraped: {len(monsters)}")
+            else:
+                logging.warning("⚠️ No data scraped.")
+    finally:
+        if conn is not None:
+            conn.close()